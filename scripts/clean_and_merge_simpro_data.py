@@ -7,11 +7,28 @@ Generates consolidated CSV and SQL for database insertion
 
 import csv
 import json
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 import uuid
 
+# rapidfuzz (C++ SIMD edit distance) gives much better fuzzy matches than
+# the substring heuristic, but the script still works without it
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:
+    fuzz = process = None
+
+# orjson serializes straight to bytes several times faster than the stdlib;
+# optional, json is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Configuration
 BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "docs" / "data"
@@ -24,6 +41,57 @@ CONTRACTS_CSV = DATA_DIR / "Customer_Contracts_Report_reportTable.csv"
 # Create output directory if it doesn't exist
 CLEANED_DATA_DIR.mkdir(exist_ok=True)
 
+# Common legal suffixes stripped when comparing near-identical names
+SUFFIX_RE = re.compile(r'\b(LLC|INC|CORPORATION|COMPANY|CORP)\b')
+
+# Precompiled patterns for name cleaning and value parsing (hot helpers)
+PAREN_RE = re.compile(r'\([^)]*\)')
+CORP_RE = re.compile(r'\bCORP\.?\b')
+INC_RE = re.compile(r'\bINC\.?\b')
+LLC_RE = re.compile(r'\bLLC\.?\b')
+CO_RE = re.compile(r'\bCO\.?\b')
+MONEY_RE = re.compile(r'[$,]')
+
+# SQL quote escaping: str.translate is a single C-level pass, and the common
+# quote-free case returns the original string untouched
+_QUOTE_TABLE = str.maketrans({"'": "''"})
+
+# PostgreSQL throughput knees around 1,000-row INSERTs; bigger statements
+# just grow the parse tree
+INSERT_BATCH_SIZE = 1000
+
+# Report noise rows that must never reach the cleaning/matching pipeline
+SKIP_NAMES = frozenset({'SMA Included', 'UNL RS', 'Monthly', 'Quarterly', 'Weekly'})
+
+def q(s):
+    """Escape single quotes in a string for use in a SQL literal"""
+    if "'" not in s:
+        return s
+    return s.translate(_QUOTE_TABLE)
+
+@dataclass(slots=True)
+class Customer:
+    """One SimPro customer plus contract rollups (slots keep thousands of
+    instances compact and attribute access cheap in the matching loop)."""
+    simpro_customer_id: str
+    company_name: str
+    company_name_cleaned: str
+    email: str = ''
+    mailing_address: str = ''
+    mailing_city: str = ''
+    mailing_state: str = ''
+    mailing_zip: str = ''
+    labor_tax_code: str = ''
+    part_tax_code: str = ''
+    is_contract_customer: bool = False
+    contracts: list = field(default_factory=list)
+    total_contract_value: float = 0.0
+    active_contract_count: int = 0
+    has_active_contracts: bool = False
+    service_tier: str = 'CORE'
+    latest_contract_email: str = ''
+    db_id: str = ''  # UUID assigned when the customer is written to SQL
+
 def clean_company_name(name):
     """Standardize company names for matching"""
     if not name:
@@ -37,13 +105,13 @@ def clean_company_name(name):
     cleaned = name
     
     # Remove parenthetical content for matching (but keep original)
-    cleaned = re.sub(r'\([^)]*\)', '', cleaned)
-    
+    cleaned = PAREN_RE.sub('', cleaned)
+
     # Standardize common abbreviations
-    cleaned = re.sub(r'\bCORP\.?\b', 'CORPORATION', cleaned)
-    cleaned = re.sub(r'\bINC\.?\b', 'INC', cleaned)
-    cleaned = re.sub(r'\bLLC\.?\b', 'LLC', cleaned)
-    cleaned = re.sub(r'\bCO\.?\b', 'COMPANY', cleaned)
+    cleaned = CORP_RE.sub('CORPORATION', cleaned)
+    cleaned = INC_RE.sub('INC', cleaned)
+    cleaned = LLC_RE.sub('LLC', cleaned)
+    cleaned = CO_RE.sub('COMPANY', cleaned)
     
     # Remove extra spaces
     cleaned = ' '.join(cleaned.split())
@@ -56,7 +124,7 @@ def parse_contract_value(value_str):
         return 0.0
     
     # Remove $ and commas
-    cleaned = re.sub(r'[$,]', '', value_str)
+    cleaned = MONEY_RE.sub('', value_str)
     
     try:
         return float(cleaned)
@@ -93,10 +161,11 @@ def load_customers():
     """Load and clean customer data"""
     customers = {}
     customer_name_map = {}  # Map cleaned names to customer IDs
+    stripped_map = {}  # Map suffix-stripped cleaned names to customer IDs
     
     print("📖 Loading customers from CSV...")
     
-    with open(CUSTOMERS_CSV, 'r', encoding='utf-8-sig') as f:
+    with open(CUSTOMERS_CSV, 'r', encoding='utf-8-sig', buffering=1 << 20, newline='') as f:
         reader = csv.DictReader(f)
         
         for row in reader:
@@ -107,126 +176,227 @@ def load_customers():
                 continue
             
             # Create customer record
-            customer = {
-                'simpro_customer_id': customer_id,
-                'company_name': company_name,
-                'company_name_cleaned': clean_company_name(company_name),
-                'email': row.get('Email', '').strip().lower(),
-                'mailing_address': row.get('Mailing Address', '').strip(),
-                'mailing_city': row.get('Mailing City', '').strip(),
-                'mailing_state': row.get('Mailing State', '').strip(),
-                'mailing_zip': row.get('Mailing ZIP Code', '').strip(),
-                'labor_tax_code': row.get('Labor Tax Code', '').strip(),
-                'part_tax_code': row.get('Part Tax Code', '').strip(),
-                'is_contract_customer': row.get('Contract Customer', '').strip().lower() == 'yes',
-                'contracts': [],
-                'total_contract_value': 0.0,
-                'active_contract_count': 0,
-                'has_active_contracts': False,
-                'service_tier': 'CORE',
-                'latest_contract_email': ''
-            }
+            customer = Customer(
+                simpro_customer_id=customer_id,
+                company_name=company_name,
+                company_name_cleaned=clean_company_name(company_name),
+                email=row.get('Email', '').strip().lower(),
+                mailing_address=row.get('Mailing Address', '').strip(),
+                mailing_city=row.get('Mailing City', '').strip(),
+                mailing_state=row.get('Mailing State', '').strip(),
+                mailing_zip=row.get('Mailing ZIP Code', '').strip(),
+                labor_tax_code=row.get('Labor Tax Code', '').strip(),
+                part_tax_code=row.get('Part Tax Code', '').strip(),
+                is_contract_customer=row.get('Contract Customer', '').strip().lower() == 'yes'
+            )
             
             customers[customer_id] = customer
             
-            # Add to name map for matching
-            cleaned_name = clean_company_name(company_name)
+            # Add to name maps for matching (already cleaned above)
+            cleaned_name = customer.company_name_cleaned
             customer_name_map[cleaned_name] = customer_id
-    
+
+            stripped = SUFFIX_RE.sub('', cleaned_name).strip()
+            if stripped:
+                stripped_map.setdefault(stripped, customer_id)
+
     print(f"✅ Loaded {len(customers)} customers")
-    return customers, customer_name_map
+    return customers, customer_name_map, stripped_map
+
+def bounded_levenshtein(a, b, maxd):
+    """Edit distance between a and b, capped at maxd (returns maxd + 1 past the cap).
+
+    O(m)-space Wagner-Fischer with an early exit once a full row exceeds
+    the cap, so hopeless comparisons cost far less than O(m*n).
+    """
+    if abs(len(a) - len(b)) > maxd:
+        return maxd + 1
+
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        row_min = i
+        for j, cb in enumerate(b, 1):
+            d = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            cur.append(d)
+            if d < row_min:
+                row_min = d
+        if row_min > maxd:
+            return maxd + 1
+        prev = cur
+
+    return prev[-1] if prev[-1] <= maxd else maxd + 1
+
+def fuzzy_match_name(cleaned_name, customer_name_map, name_choices, long_names):
+    """Fuzzy-match a cleaned contract name against the known customer names.
+
+    This is the hot kernel of the fallback path; it takes only prebuilt
+    lookup structures so callers pay no per-row setup cost.
+    """
+    if process is not None:
+        # Scored fuzzy match over all customer names
+        hit = process.extractOne(cleaned_name, name_choices,
+                                 scorer=fuzz.token_set_ratio, score_cutoff=88)
+        if hit:
+            return customer_name_map[hit[0]]
+        return None
 
-def load_and_match_contracts(customers, customer_name_map):
+    if len(cleaned_name) > 10:
+        # Check if one name contains the other (for subsidiaries, etc.)
+        for stored_name, cust_id in long_names:
+            if cleaned_name in stored_name or stored_name in cleaned_name:
+                return cust_id
+
+    # Catch near-misses (typos) with a capped edit distance
+    maxd = max(3, len(cleaned_name) // 10)
+    best_id = None
+    best_dist = maxd + 1
+    for stored_name, cust_id in customer_name_map.items():
+        d = bounded_levenshtein(cleaned_name, stored_name, maxd)
+        if d < best_dist:
+            best_dist = d
+            best_id = cust_id
+
+    return best_id
+
+def _match_names_chunk(names, customer_name_map, name_choices, long_names):
+    """Worker: fuzzy-match a chunk of unresolved names (top level so it pickles)"""
+    return {name: fuzzy_match_name(name, customer_name_map, name_choices, long_names)
+            for name in names}
+
+def resolve_fuzzy_matches(pending_names, customer_name_map, name_choices, long_names):
+    """Fuzzy-match unresolved names, fanning out across cores when there are many.
+
+    Each name is independent and CPU-bound, so chunks go to a process
+    pool; small batches stay serial to avoid the fork/pickle overhead.
+    """
+    pending_names = list(pending_names)
+    workers = os.cpu_count() or 1
+
+    if len(pending_names) < 500 or workers < 2:
+        return _match_names_chunk(pending_names, customer_name_map,
+                                  name_choices, long_names)
+
+    chunks = [pending_names[i::workers] for i in range(workers)]
+    chunks = [chunk for chunk in chunks if chunk]
+
+    resolved = {}
+    with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+        futures = [executor.submit(_match_names_chunk, chunk, customer_name_map,
+                                   name_choices, long_names)
+                   for chunk in chunks]
+        for future in futures:
+            resolved.update(future.result())
+
+    return resolved
+
+def attach_contract_to_customer(customers, contract):
+    """Link a matched contract to its customer and update rollup statistics"""
+    customer = customers[contract['matched_customer_id']]
+    customer.contracts.append(contract)
+
+    if contract['contract_status'] == 'active':
+        customer.has_active_contracts = True
+        customer.active_contract_count += 1
+        customer.total_contract_value += contract['contract_value']
+
+        if contract['contract_email']:
+            customer.latest_contract_email = contract['contract_email']
+
+def load_and_match_contracts(customers, customer_name_map, stripped_map):
     """Load contracts and match them to customers"""
     contracts = []
     unmatched_contracts = []
+    pending = []  # (contract, cleaned_name) rows that missed the O(1) lookups
     matched_count = 0
     
     print("\n📖 Loading contracts from CSV...")
-    
-    with open(CONTRACTS_CSV, 'r', encoding='utf-8-sig') as f:
-        lines = f.readlines()
-    
-    # Skip the first line (report criteria) and parse from line 2
-    reader = csv.DictReader(lines[1:])
-    
-    for row_num, row in enumerate(reader, start=3):  # Start at line 3 of original file
-        customer_name = row.get('Customer', '').strip()
-        contract_name = row.get('Contract Name', '').strip()
-        
-        # Skip invalid rows (like continuation lines)
-        if not customer_name or not contract_name:
-            continue
-        
-        # Skip rows that are clearly not customer data
-        if customer_name in ['SMA Included', 'UNL RS', 'Monthly', 'Quarterly', 'Weekly'] or customer_name.isdigit():
-            continue
-        
-        if 'Selected Criteria' in customer_name:
-            continue
-        
-        # Try to match customer
-        cleaned_name = clean_company_name(customer_name)
-        matched_customer_id = None
-        
-        # Try exact match first
-        if cleaned_name in customer_name_map:
-            matched_customer_id = customer_name_map[cleaned_name]
-        else:
-            # Try fuzzy matching
-            for stored_name, cust_id in customer_name_map.items():
-                # Check if one contains the other (for subsidiaries, etc.)
-                if len(cleaned_name) > 10 and len(stored_name) > 10:
-                    if cleaned_name in stored_name or stored_name in cleaned_name:
-                        matched_customer_id = cust_id
-                        break
-                
-                # Check for very similar names (remove common suffixes and compare)
-                cleaned_stripped = re.sub(r'\b(LLC|INC|CORPORATION|COMPANY|CORP)\b', '', cleaned_name).strip()
-                stored_stripped = re.sub(r'\b(LLC|INC|CORPORATION|COMPANY|CORP)\b', '', stored_name).strip()
-                
-                if cleaned_stripped and stored_stripped:
-                    if cleaned_stripped == stored_stripped:
-                        matched_customer_id = cust_id
-                        break
+
+    # Fuzzy fallback candidates, built once: all names for rapidfuzz,
+    # long names only for the substring heuristic
+    name_choices = list(customer_name_map.keys())
+    long_names = [(name, cust_id) for name, cust_id in customer_name_map.items() if len(name) > 10]
+
+    # Note: parsing is deliberately a single sequential stream. Splitting the
+    # file at newline offsets (mmap + per-segment workers) is unsafe here
+    # because contract notes are quoted fields that may contain newlines; the
+    # CPU-bound matching work is what gets parallelized instead (see
+    # resolve_fuzzy_matches).
+    with open(CONTRACTS_CSV, 'r', encoding='utf-8-sig', buffering=1 << 20, newline='') as f:
+        # Skip the first line (report criteria) and parse from line 2
+        next(f)
+        reader = csv.DictReader(f)
+
+        for row_num, row in enumerate(reader, start=3):  # Start at line 3 of original file
+            customer_name = row.get('Customer', '').strip()
+            contract_name = row.get('Contract Name', '').strip()
         
-        # Create contract record
-        contract_value = parse_contract_value(row.get('Value', '0'))
-        contract_status = row.get('Status', '').strip()
+            # Skip invalid rows (like continuation lines)
+            if not customer_name or not contract_name:
+                continue
         
-        contract = {
-            'id': str(uuid.uuid4()),
-            'customer_name_in_contract': customer_name,
-            'contract_name': contract_name,
-            'contract_number': row.get('Contract No.', '').strip(),
-            'contract_value': contract_value,
-            'contract_status': 'active' if contract_status.lower() == 'active' else 'expired',
-            'start_date': parse_date(row.get('Start Date', '')),
-            'end_date': parse_date(row.get('End Date', '')),
-            'contract_email': row.get('Email', '').strip().lower(),
-            'contract_notes': row.get('Notes', '').strip(),
-            'matched_customer_id': matched_customer_id
-        }
+            # Skip rows that are clearly not customer data — all cheap string
+            # checks, done before the regex cleaning below runs
+            if (customer_name in SKIP_NAMES or customer_name.isdigit()
+                    or 'Selected Criteria' in customer_name):
+                continue
+
+            # Try to match customer
+            cleaned_name = clean_company_name(customer_name)
+
+            # Try exact match first, then the suffix-stripped variant
+            matched_customer_id = customer_name_map.get(cleaned_name)
+
+            if matched_customer_id is None:
+                cleaned_stripped = SUFFIX_RE.sub('', cleaned_name).strip()
+                if cleaned_stripped:
+                    matched_customer_id = stripped_map.get(cleaned_stripped)
+
+            # Expensive fuzzy matching is deferred to a second phase below
+            # so it can run in parallel over the unique unresolved names
+
+            # Create contract record
+            contract_value = parse_contract_value(row.get('Value', '0'))
+            contract_status = row.get('Status', '').strip()
         
-        contracts.append(contract)
+            # No client-side id: the table default (gen_random_uuid) fills it
+            contract = {
+                'customer_name_in_contract': customer_name,
+                'contract_name': contract_name,
+                'contract_number': row.get('Contract No.', '').strip(),
+                'contract_value': contract_value,
+                'contract_status': 'active' if contract_status.lower() == 'active' else 'expired',
+                'start_date': parse_date(row.get('Start Date', '')),
+                'end_date': parse_date(row.get('End Date', '')),
+                'contract_email': row.get('Email', '').strip().lower(),
+                'contract_notes': row.get('Notes', '').strip(),
+                'matched_customer_id': matched_customer_id
+            }
         
-        if matched_customer_id:
-            matched_count += 1
-            # Add contract to customer
-            customer = customers[matched_customer_id]
-            customer['contracts'].append(contract)
-            
-            # Update customer statistics
-            if contract['contract_status'] == 'active':
-                customer['has_active_contracts'] = True
-                customer['active_contract_count'] += 1
-                customer['total_contract_value'] += contract_value
-                
-                if contract['contract_email']:
-                    customer['latest_contract_email'] = contract['contract_email']
-        else:
-            unmatched_contracts.append((customer_name, contract_name, contract_value))
-    
+            contracts.append(contract)
+
+            if matched_customer_id:
+                matched_count += 1
+                attach_contract_to_customer(customers, contract)
+            else:
+                pending.append((contract, cleaned_name))
+
+    # Second phase: fuzzy-match the leftovers (parallel when numerous)
+    if pending:
+        resolved = resolve_fuzzy_matches({name for _, name in pending},
+                                         customer_name_map, name_choices, long_names)
+
+        for contract, cleaned_name in pending:
+            cust_id = resolved.get(cleaned_name)
+            if cust_id:
+                contract['matched_customer_id'] = cust_id
+                matched_count += 1
+                attach_contract_to_customer(customers, contract)
+            else:
+                unmatched_contracts.append((contract['customer_name_in_contract'],
+                                            contract['contract_name'],
+                                            contract['contract_value']))
+
     print(f"✅ Loaded {len(contracts)} contracts")
     print(f"✅ Matched {matched_count} contracts to customers")
     print(f"⚠️  Unmatched contracts: {len(unmatched_contracts)}")
@@ -238,7 +408,7 @@ def load_and_match_contracts(customers, customer_name_map):
     
     # Update service tiers based on total contract values
     for customer in customers.values():
-        customer['service_tier'] = determine_service_tier(customer['total_contract_value'])
+        customer.service_tier = determine_service_tier(customer.total_contract_value)
     
     return contracts
 
@@ -260,7 +430,7 @@ def export_cleaned_data(customers, contracts):
         writer.writeheader()
         
         for customer in customers.values():
-            row = {k: customer[k] for k in fieldnames}
+            row = {k: getattr(customer, k) for k in fieldnames}
             writer.writerow(row)
     
     print(f"✅ Exported {len(customers)} customers to {customers_output}")
@@ -282,23 +452,32 @@ def export_cleaned_data(customers, contracts):
     
     print(f"✅ Exported {len(contracts)} contracts to {contracts_output}")
     
-    # Export summary statistics
+    # Export summary statistics (single pass over customers)
+    tiers = {'CORE': 0, 'ASSURE': 0, 'GUARDIAN': 0}
+    customers_with_contracts = 0
+    total_contract_value = 0.0
+    for c in customers.values():
+        if c.contracts:
+            customers_with_contracts += 1
+        tiers[c.service_tier] += 1
+        total_contract_value += c.total_contract_value
+
     stats = {
         'total_customers': len(customers),
-        'customers_with_contracts': len([c for c in customers.values() if c['contracts']]),
+        'customers_with_contracts': customers_with_contracts,
         'total_contracts': len(contracts),
-        'active_contracts': len([c for c in contracts if c['contract_status'] == 'active']),
-        'total_contract_value': sum(c['total_contract_value'] for c in customers.values()),
-        'service_tiers': {
-            'CORE': len([c for c in customers.values() if c['service_tier'] == 'CORE']),
-            'ASSURE': len([c for c in customers.values() if c['service_tier'] == 'ASSURE']),
-            'GUARDIAN': len([c for c in customers.values() if c['service_tier'] == 'GUARDIAN'])
-        }
+        'active_contracts': sum(1 for c in contracts if c['contract_status'] == 'active'),
+        'total_contract_value': total_contract_value,
+        'service_tiers': tiers
     }
     
     stats_output = CLEANED_DATA_DIR / "data_summary.json"
-    with open(stats_output, 'w', encoding='utf-8') as f:
-        json.dump(stats, f, indent=2)
+    if orjson is not None:
+        with open(stats_output, 'wb') as f:
+            f.write(orjson.dumps(stats, option=orjson.OPT_INDENT_2))
+    else:
+        with open(stats_output, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, indent=2)
     
     print(f"✅ Exported statistics to {stats_output}")
     
@@ -307,90 +486,105 @@ def export_cleaned_data(customers, contracts):
 def generate_sql(customers, contracts):
     """Generate SQL insert statements for Supabase"""
     print("\n📝 Generating SQL statements...")
-    
-    sql_lines = []
-    
-    # Header
-    sql_lines.append("-- SimPro Data Population")
-    sql_lines.append(f"-- Generated: {datetime.now().isoformat()}")
-    sql_lines.append("")
-    sql_lines.append("-- Clear existing data")
-    sql_lines.append("DELETE FROM simpro_customer_contracts;")
-    sql_lines.append("DELETE FROM simpro_customers;")
-    sql_lines.append("")
-    
+
     # Insert customers (only those with contracts)
-    customers_with_contracts = {k: v for k, v in customers.items() if v['contracts']}
-    
-    sql_lines.append(f"-- Insert {len(customers_with_contracts)} customers with contracts")
-    sql_lines.append("INSERT INTO simpro_customers (")
-    sql_lines.append("  id, simpro_customer_id, company_name, email,")
-    sql_lines.append("  mailing_address, mailing_city, mailing_state, mailing_zip,")
-    sql_lines.append("  is_contract_customer, has_active_contracts,")
-    sql_lines.append("  active_contract_count, total_contract_value, service_tier")
-    sql_lines.append(") VALUES")
-    
-    customer_values = []
-    for customer in customers_with_contracts.values():
-        cust_id = str(uuid.uuid4())
-        customer['db_id'] = cust_id  # Store for contract references
-        
-        value = (
-            f"  ('{cust_id}', "
-            f"'{customer['simpro_customer_id']}', "
-            f"'{customer['company_name'].replace("'", "''")}', "
-            f"'{customer['email'].replace("'", "''")}', "
-            f"'{customer['mailing_address'].replace("'", "''")}', "
-            f"'{customer['mailing_city'].replace("'", "''")}', "
-            f"'{customer['mailing_state']}', "
-            f"'{customer['mailing_zip']}', "
-            f"{'true' if customer['is_contract_customer'] else 'false'}, "
-            f"{'true' if customer['has_active_contracts'] else 'false'}, "
-            f"{customer['active_contract_count']}, "
-            f"{customer['total_contract_value']}, "
-            f"'{customer['service_tier']}')"
-        )
-        customer_values.append(value)
-    
-    sql_lines.append(',\n'.join(customer_values) + ';')
-    sql_lines.append("")
-    
-    # Insert contracts
+    customers_with_contracts = {k: v for k, v in customers.items() if v.contracts}
     matched_contracts = [c for c in contracts if c['matched_customer_id']]
-    
-    if matched_contracts:
-        sql_lines.append(f"-- Insert {len(matched_contracts)} matched contracts")
-        sql_lines.append("INSERT INTO simpro_customer_contracts (")
-        sql_lines.append("  id, customer_id, contract_name, contract_number,")
-        sql_lines.append("  contract_value, contract_status, start_date, end_date")
-        sql_lines.append(") VALUES")
-        
-        contract_values = []
-        for contract in matched_contracts:
-            customer = customers[contract['matched_customer_id']]
-            if 'db_id' in customer:  # Only if customer was inserted
-                start_date = f"'{contract['start_date']}'" if contract['start_date'] else "NULL"
-                end_date = f"'{contract['end_date']}'" if contract['end_date'] else "NULL"
-                
-                value = (
-                    f"  ('{contract['id']}', "
-                    f"'{customer['db_id']}', "
-                    f"'{contract['contract_name'].replace("'", "''")}', "
-                    f"'{contract['contract_number'].replace("'", "''")}', "
-                    f"{contract['contract_value']}, "
-                    f"'{contract['contract_status']}', "
-                    f"{start_date}, "
-                    f"{end_date})"
-                )
-                contract_values.append(value)
-        
-        sql_lines.append(',\n'.join(contract_values) + ';')
-    
-    # Write SQL file
+
     sql_output = OUTPUT_DIR / f"simpro_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.sql"
-    with open(sql_output, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(sql_lines))
-    
+
+    # Rows are written as they are formatted instead of being accumulated into
+    # one multi-MB string, so peak memory stays at a single row
+    with open(sql_output, 'w', encoding='utf-8', buffering=1 << 20) as f:
+        # Header
+        f.write("-- SimPro Data Population\n")
+        f.write(f"-- Generated: {datetime.now().isoformat()}\n")
+        f.write("\n")
+        f.write("-- Clear existing data\n")
+        f.write("DELETE FROM simpro_customer_contracts;\n")
+        f.write("DELETE FROM simpro_customers;\n")
+        f.write("\n")
+
+        customer_insert = (
+            "INSERT INTO simpro_customers (\n"
+            "  id, simpro_customer_id, company_name, email,\n"
+            "  mailing_address, mailing_city, mailing_state, mailing_zip,\n"
+            "  is_contract_customer, has_active_contracts,\n"
+            "  active_contract_count, total_contract_value, service_tier\n"
+            ") VALUES\n"
+        )
+        f.write(f"-- Insert {len(customers_with_contracts)} customers with contracts\n")
+        f.write(customer_insert)
+
+        in_batch = 0
+        for customer in customers_with_contracts.values():
+            cust_id = str(uuid.uuid4())
+            customer.db_id = cust_id  # Store for contract references
+
+            value = (
+                f"  ('{cust_id}', "
+                f"'{customer.simpro_customer_id}', "
+                f"'{q(customer.company_name)}', "
+                f"'{q(customer.email)}', "
+                f"'{q(customer.mailing_address)}', "
+                f"'{q(customer.mailing_city)}', "
+                f"'{customer.mailing_state}', "
+                f"'{customer.mailing_zip}', "
+                f"{'true' if customer.is_contract_customer else 'false'}, "
+                f"{'true' if customer.has_active_contracts else 'false'}, "
+                f"{customer.active_contract_count}, "
+                f"{customer.total_contract_value}, "
+                f"'{customer.service_tier}')"
+            )
+            if in_batch == INSERT_BATCH_SIZE:
+                # Close this statement and start a fresh batch
+                f.write(';\n\n')
+                f.write(customer_insert)
+                in_batch = 0
+            if in_batch:
+                f.write(',\n')
+            f.write(value)
+            in_batch += 1
+        f.write(';\n')
+        f.write('\n')
+
+        # Insert contracts
+        if matched_contracts:
+            contract_insert = (
+                "INSERT INTO simpro_customer_contracts (\n"
+                "  customer_id, contract_name, contract_number,\n"
+                "  contract_value, contract_status, start_date, end_date\n"
+                ") VALUES\n"
+            )
+            f.write(f"-- Insert {len(matched_contracts)} matched contracts\n")
+            f.write(contract_insert)
+
+            in_batch = 0
+            for contract in matched_contracts:
+                customer = customers[contract['matched_customer_id']]
+                if customer.db_id:  # Only if customer was inserted
+                    start_date = f"'{contract['start_date']}'" if contract['start_date'] else "NULL"
+                    end_date = f"'{contract['end_date']}'" if contract['end_date'] else "NULL"
+
+                    value = (
+                        f"  ('{customer.db_id}', "
+                        f"'{q(contract['contract_name'])}', "
+                        f"'{q(contract['contract_number'])}', "
+                        f"{contract['contract_value']}, "
+                        f"'{contract['contract_status']}', "
+                        f"{start_date}, "
+                        f"{end_date})"
+                    )
+                    if in_batch == INSERT_BATCH_SIZE:
+                        f.write(';\n\n')
+                        f.write(contract_insert)
+                        in_batch = 0
+                    if in_batch:
+                        f.write(',\n')
+                    f.write(value)
+                    in_batch += 1
+            f.write(';\n')
+
     print(f"✅ Generated SQL file: {sql_output}")
     
     return sql_output
@@ -401,8 +595,8 @@ def main():
     print("=" * 50)
     
     # Load and clean data
-    customers, customer_name_map = load_customers()
-    contracts = load_and_match_contracts(customers, customer_name_map)
+    customers, customer_name_map, stripped_map = load_customers()
+    contracts = load_and_match_contracts(customers, customer_name_map, stripped_map)
     
     # Export cleaned data
     stats = export_cleaned_data(customers, contracts)
@@ -4,82 +4,54 @@ Import remaining SimPro customers from CSV using batch SQL
 This script creates SQL INSERT statements for the remaining customers
 """
 
+import argparse
 import csv
+import itertools
 import re
 import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 
-def clean_sql_string(value):
-    """Clean and escape string for SQL"""
-    if not value:
-        return ''
-    # Remove quotes and escape single quotes
-    return value.replace("'", "''").replace('"', '')
+# psycopg (v3) enables streaming rows straight into the database with COPY,
+# which skips per-row INSERT parse/plan work entirely. Optional: without it
+# (or without DATABASE_URL) the script writes SQL batch files as before.
+try:
+    import psycopg
+except ImportError:
+    psycopg = None
 
-def parse_csv_file():
-    """Parse the CSV file and return customer records"""
-    csv_path = os.path.join(os.path.dirname(__file__), '..', 'docs', 'cleaned_data', 'final_customer_database.csv')
+# Paths resolved once at import; Path arithmetic replaces the repeated
+# os.path.join calls scattered through the open() sites
+BASE_DIR = Path(__file__).parent.parent
+CSV_PATH = BASE_DIR / 'docs' / 'cleaned_data' / 'final_customer_database.csv'
+OUTPUT_DIR = BASE_DIR / 'sql_batches'
 
-    customers = []
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                customer_id = int(row['simpro_customer_id']) if row['simpro_customer_id'] else None
-                if customer_id and customer_id > 130:  # Skip already imported
-                    customers.append({
-                        'id': customer_id,
-                        'company_name': clean_sql_string(row['company_name']),
-                        'address': clean_sql_string(row['mailing_address']),
-                        'city': clean_sql_string(row['mailing_city']),
-                        'state': clean_sql_string(row['mailing_state']),
-                        'zip': clean_sql_string(row['mailing_zip']),
-                        'email': clean_sql_string(row.get('email', '') or row.get('latest_contract_email', '')),
-                        'service_tier': row.get('service_tier', 'CORE'),
-                        'has_contracts': row.get('has_active_contracts', 'FALSE') == 'TRUE',
-                        'contract_value': float(row.get('total_contract_value', 0) or 0),
-                        'contract_number': clean_sql_string(row.get('contract_number', '')),
-                        'contract_status': clean_sql_string(row.get('contract_status', '')),
-                        'latest_email': clean_sql_string(row.get('latest_contract_email', ''))
-                    })
-            except (ValueError, KeyError) as e:
-                print(f"Skipping row due to error: {e}")
-                continue
+CUSTOMER_COLUMNS = (
+    'legacy_customer_id', 'company_name', 'mailing_address', 'mailing_city',
+    'mailing_state', 'mailing_zip', 'primary_contact_email', 'service_tier',
+    'has_active_contracts', 'total_contract_value',
+    'contract_number', 'contract_status', 'latest_contract_email'
+)
+
+STAGING_TABLE_SQL = """
+CREATE UNLOGGED TABLE IF NOT EXISTS customers_staging (
+  legacy_customer_id INTEGER,
+  company_name TEXT,
+  mailing_address TEXT,
+  mailing_city TEXT,
+  mailing_state TEXT,
+  mailing_zip TEXT,
+  primary_contact_email TEXT,
+  service_tier TEXT,
+  has_active_contracts BOOLEAN,
+  total_contract_value NUMERIC,
+  contract_number TEXT,
+  contract_status TEXT,
+  latest_contract_email TEXT
+)
+"""
 
-    return customers
-
-def create_sql_batches(customers, batch_size=50):
-    """Create SQL INSERT batches"""
-    sql_batches = []
-
-    for i in range(0, len(customers), batch_size):
-        batch = customers[i:i + batch_size]
-
-        values = []
-        for customer in batch:
-            value_str = f"""({customer['id']}, '{customer['company_name']}', '{customer['address']}', '{customer['city']}', '{customer['state']}', '{customer['zip']}', '{customer['email']}', '{customer['service_tier']}', {customer['has_contracts']}, {customer['contract_value']}, '{customer['company_name']}', '{customer['contract_number']}', '{customer['contract_status']}', '{customer['latest_email']}', NOW(), NOW())"""
-            values.append(value_str)
-
-        sql = f"""
-INSERT INTO customers (
-  legacy_customer_id,
-  company_name,
-  mailing_address,
-  mailing_city,
-  mailing_state,
-  mailing_zip,
-  primary_contact_email,
-  service_tier,
-  has_active_contracts,
-  total_contract_value,
-  site_nickname,
-  contract_number,
-  contract_status,
-  latest_contract_email,
-  created_at,
-  updated_at
-) VALUES
-{','.join(values)}
-ON CONFLICT (legacy_customer_id) DO UPDATE SET
+UPSERT_SET_SQL = """ON CONFLICT (legacy_customer_id) DO UPDATE SET
   company_name = EXCLUDED.company_name,
   mailing_address = EXCLUDED.mailing_address,
   mailing_city = EXCLUDED.mailing_city,
@@ -92,33 +64,293 @@ ON CONFLICT (legacy_customer_id) DO UPDATE SET
   contract_number = EXCLUDED.contract_number,
   contract_status = EXCLUDED.contract_status,
   latest_contract_email = EXCLUDED.latest_contract_email,
-  updated_at = NOW();
+  updated_at = NOW()"""
+
+UPSERT_FROM_STAGING_SQL = f"""
+INSERT INTO customers ({', '.join(CUSTOMER_COLUMNS)}, created_at, updated_at)
+SELECT {', '.join(CUSTOMER_COLUMNS)}, NOW(), NOW() FROM customers_staging
+{UPSERT_SET_SQL}
 """
-        sql_batches.append(sql)
 
-    return sql_batches
+UPSERT_ROW_SQL = f"""
+INSERT INTO customers ({', '.join(CUSTOMER_COLUMNS)}, created_at, updated_at)
+VALUES ({', '.join(['%s'] * len(CUSTOMER_COLUMNS))}, NOW(), NOW())
+{UPSERT_SET_SQL}
+"""
+
+def upsert_with_executemany(customers, db_url, batch_size=1000):
+    """Parameterized upsert in pipeline mode, for roles without DDL rights.
+
+    Slower than the staging-table COPY but still parameterized end to end,
+    and pipeline mode amortizes the round trips per 1,000-row batch.
+    """
+    count = 0
+    with psycopg.connect(db_url) as conn:
+        with conn.pipeline(), conn.cursor() as cur:
+            for batch in iter_batches(customers, batch_size):
+                cur.executemany(UPSERT_ROW_SQL, batch)
+                count += len(batch)
+        conn.commit()
+    return count
+
+def copy_into_database(customers, db_url):
+    """Stream rows into a staging table via COPY, then upsert in one statement"""
+    with psycopg.connect(db_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute(STAGING_TABLE_SQL)
+            cur.execute("TRUNCATE customers_staging")
+
+            count = 0
+            # CSV-format COPY: rows go over the wire as plain CSV text that
+            # the server parses in C, instead of per-value write_row adaption.
+            # QUOTE_ALL because COPY CSV reads an unquoted empty field as
+            # NULL; a quoted "" stays an empty string, matching what the
+            # executemany and .sql file paths store for blank fields
+            with cur.copy(f"COPY customers_staging ({', '.join(CUSTOMER_COLUMNS)}) FROM STDIN (FORMAT CSV)") as cp:
+                writer = csv.writer(cp, lineterminator='\n', quoting=csv.QUOTE_ALL)
+                for c in customers:
+                    writer.writerow(c)
+                    count += 1
+
+            cur.execute(UPSERT_FROM_STAGING_SQL)
+            cur.execute("DROP TABLE customers_staging")
+        conn.commit()
+    return count
+
+# Deletes double quotes in one C-level pass; built once at import
+_DQUOTE_TABLE = {ord('"'): None}
+
+# Truthy spellings seen across exports; one hashed membership test per row
+# instead of a chain of string comparisons
+_TRUTHY = frozenset({'TRUE', 'true', 'True', '1', 't', 'T'})
+
+def clean_sql_string(value):
+    """Clean and escape string for SQL"""
+    if not value:
+        return ''
+    # Remove double quotes and escape single quotes; the common quote-free
+    # case returns the original string with no new allocations
+    if '"' in value:
+        value = value.translate(_DQUOTE_TABLE)
+    if "'" in value:
+        value = value.replace("'", "''")
+    return value
+
+def iter_customers():
+    """Yield customer rows from the CSV one at a time.
+
+    Rows come out as 13-tuples ordered to match CUSTOMER_COLUMNS — tuples
+    are far smaller than dicts and every consumer (%-formatting, COPY,
+    executemany) wants that positional order anyway. Fields are raw: the
+    direct database paths bind them as-is, and only the file-emission
+    mode escapes them (see _sql_row). A generator keeps the working set
+    at one row regardless of CSV size; downstream consumers batch with
+    iter_batches as needed.
+    """
+    # newline='' hands raw newlines to the csv module, as the docs require;
+    # it also spares the text layer its universal-newline translation pass
+    with open(CSV_PATH, 'r', encoding='utf-8', newline='') as f:
+        # csv.reader skips the per-row dict that DictReader builds; only the
+        # 13 needed columns are ever touched, via positions resolved once
+        # from the header (-1 marks optional columns the export may not
+        # contain), so unused columns cost nothing beyond the field split
+        reader = csv.reader(f)
+        header = next(reader)
+        pos = {name: i for i, name in enumerate(header)}
+
+        i_id = pos['simpro_customer_id']
+        i_name = pos['company_name']
+        i_addr = pos['mailing_address']
+        i_city = pos['mailing_city']
+        i_state = pos['mailing_state']
+        i_zip = pos['mailing_zip']
+        i_email = pos.get('email', -1)
+        i_tier = pos.get('service_tier', -1)
+        i_active = pos.get('has_active_contracts', -1)
+        i_value = pos.get('total_contract_value', -1)
+        i_number = pos.get('contract_number', -1)
+        i_status = pos.get('contract_status', -1)
+        i_latest = pos.get('latest_contract_email', -1)
+
+        for row in reader:
+            try:
+                # Filter on the ID first so skipped rows never pay for
+                # tuple building
+                raw_id = row[i_id]
+                if not raw_id:
+                    continue
+                customer_id = int(raw_id)
+                if customer_id <= 130:  # Skip already imported
+                    continue
+
+                latest_email = row[i_latest] if i_latest >= 0 else ''
+                # Most rows carry no contract value; an empty-string check
+                # skips float('') exception raising and the `or 0` dance
+                tcv = row[i_value] if i_value >= 0 else ''
+                yield (
+                    customer_id,
+                    row[i_name],
+                    row[i_addr],
+                    row[i_city],
+                    row[i_state],
+                    row[i_zip],
+                    (row[i_email] if i_email >= 0 else '') or latest_email,
+                    row[i_tier] if i_tier >= 0 else 'CORE',
+                    i_active >= 0 and row[i_active] in _TRUTHY,
+                    float(tcv) if tcv else 0.0,
+                    row[i_number] if i_number >= 0 else '',
+                    row[i_status] if i_status >= 0 else '',
+                    latest_email
+                )
+            except (ValueError, IndexError) as e:
+                print(f"Skipping row due to error: {e}")
+                continue
+
+def iter_batches(iterable, n):
+    """Yield lists of up to n items from iterable"""
+    it = iter(iterable)
+    while True:
+        batch = list(itertools.islice(it, n))
+        if not batch:
+            return
+        yield batch
+
+# Row template for file-output mode, hoisted so the C-level % operator does
+# the per-row formatting; field order matches CUSTOMER_COLUMNS
+ROW_TMPL = ("(%d, '%s', '%s', '%s', '%s', '%s', '%s', '%s', %s, %s, "
+            "'%s', '%s', '%s', NOW(), NOW())")
+
+# Upsert header/footer built once at import from CUSTOMER_COLUMNS; both
+# file-output modes share them, leaving only the VALUES join per batch
+INSERT_PREFIX = (
+    "\nINSERT INTO customers (\n  "
+    + ",\n  ".join(CUSTOMER_COLUMNS + ('created_at', 'updated_at'))
+    + "\n) VALUES\n"
+)
+INSERT_SUFFIX = "\n" + UPSERT_SET_SQL + ";\n"
+
+def _sql_row(customer):
+    """Escape the string fields of a row for SQL-literal emission.
+
+    Only the file-output modes go through here; the COPY and executemany
+    paths bind the raw tuples, where literal escaping would corrupt data.
+    """
+    _clean = clean_sql_string
+    return (
+        customer[0],
+        _clean(customer[1]),
+        _clean(customer[2]),
+        _clean(customer[3]),
+        _clean(customer[4]),
+        _clean(customer[5]),
+        _clean(customer[6]),
+        _clean(customer[7]),
+        customer[8],
+        customer[9],
+        _clean(customer[10]),
+        _clean(customer[11]),
+        _clean(customer[12])
+    )
+
+def build_batch_sql(batch):
+    """Build the upsert SQL for one batch of customers"""
+    values = [ROW_TMPL % _sql_row(customer) for customer in batch]
+    return INSERT_PREFIX + ',\n'.join(values) + INSERT_SUFFIX
+
+def write_single_file(customers, output_dir):
+    """Write one idempotent upsert statement covering every customer.
+
+    A single INSERT ... VALUES ... ON CONFLICT plans and commits once
+    instead of once per batch file; rows stream to the file as they are
+    formatted so the VALUES list is never held in memory.
+    """
+    filepath = output_dir / 'all_customers.sql'
+
+    # Pull the first row before opening so zero surviving rows produce no
+    # file at all (a bare INSERT ... VALUES with an empty list is invalid
+    # SQL), mirroring how batch mode writes zero files for zero rows
+    it = iter(customers)
+    first = next(it, None)
+    if first is None:
+        return filepath, 0
+
+    count = 1
+    with open(filepath, 'w', encoding='utf-8', newline='\n', buffering=1 << 20) as f:
+        f.write(INSERT_PREFIX)
+        f.write(ROW_TMPL % _sql_row(first))
+        for customer in it:
+            f.write(',\n')
+            f.write(ROW_TMPL % _sql_row(customer))
+            count += 1
+        f.write(INSERT_SUFFIX)
+
+    return filepath, count
+
+def _write_batch(i, batch, output_dir):
+    """Worker: render and write one batch file (top level so it pickles)"""
+    filename = f"customer_batch_{i:04d}.sql"
+    filepath = output_dir / filename
+    # Separate files are what the Supabase MCP migration flow consumes, so
+    # they stay; a 1 MiB buffer lets each file go out in one write() call
+    with open(filepath, 'w', encoding='utf-8', newline='\n', buffering=1 << 20) as f:
+        f.write(build_batch_sql(batch))
+    return filename, len(batch)
 
 def main():
     """Main function"""
-    print("Parsing CSV file...")
-    customers = parse_csv_file()
-    print(f"Found {len(customers)} customers to import (after ID 130)")
+    parser = argparse.ArgumentParser(description='Import remaining SimPro customers')
+    parser.add_argument('--sql-only', action='store_true',
+                        help='always write SQL batch files, even if DATABASE_URL is set')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='rows per INSERT batch (default 1000; PostgreSQL '
+                             'throughput plateaus around there)')
+    parser.add_argument('--single-file', action='store_true',
+                        help='emit one all_customers.sql upsert instead of '
+                             'per-batch files')
+    args = parser.parse_args()
+
+    # Direct load when a database URL is available; otherwise fall back
+    # to generating SQL batch files for Supabase MCP migrations. Customers
+    # stream from the CSV one batch at a time in either mode.
+    db_url = os.environ.get('DATABASE_URL')
+    if db_url and psycopg is not None and not args.sql_only:
+        try:
+            print("Loading customers via COPY...")
+            count = copy_into_database(iter_customers(), db_url)
+        except psycopg.errors.InsufficientPrivilege:
+            # No DDL rights for the staging table: parameterized upsert instead
+            print("Staging table not permitted, falling back to executemany...")
+            count = upsert_with_executemany(iter_customers(), db_url,
+                                            args.batch_size)
+        print(f"Upserted {count} customers (after ID 130)")
+        return
 
     print("Creating SQL batches...")
-    sql_batches = create_sql_batches(customers)
+    output_dir = OUTPUT_DIR
+    output_dir.mkdir(exist_ok=True)
 
-    # Write SQL files
-    output_dir = os.path.join(os.path.dirname(__file__), '..', 'sql_batches')
-    os.makedirs(output_dir, exist_ok=True)
+    if args.single_file:
+        filepath, count = write_single_file(iter_customers(), output_dir)
+        if count:
+            print(f"Created {filepath.name} with {count} customers in sql_batches/")
+        else:
+            print("No customers to import (after ID 130); nothing written")
+        return
 
-    for i, sql in enumerate(sql_batches):
-        filename = f"customer_batch_{i+2:02d}.sql"
-        filepath = os.path.join(output_dir, filename)
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(sql)
-        print(f"Created {filename}")
+    # Each batch file depends only on its own slice, so rendering and
+    # writing fan out across cores; submit() ships one batch per task
+    count = 0
+    batches = 0
+    with ProcessPoolExecutor() as executor:
+        futures = [executor.submit(_write_batch, i, batch, output_dir)
+                   for i, batch in enumerate(iter_batches(iter_customers(), args.batch_size), start=2)]
+        for future in futures:
+            filename, written = future.result()
+            print(f"Created {filename}")
+            count += written
+            batches += 1
 
-    print(f"\nGenerated {len(sql_batches)} SQL batch files in sql_batches/")
+    print(f"\nGenerated {batches} SQL batch files for {count} customers in sql_batches/")
     print("You can now run these through Supabase MCP migrations")
 
 if __name__ == "__main__":